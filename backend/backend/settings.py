@@ -48,6 +48,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'corsheaders',
+    'inference',
 ]
 
 MIDDLEWARE = [
@@ -162,3 +163,46 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Model drift monitoring
+DRIFT_PSI_THRESHOLD = 0.2   # population stability index that counts as feature drift
+DRIFT_MAPE_RATIO = 1.5      # live MAPE / training MAPE that counts as degraded accuracy
+DRIFT_MIN_OUTCOMES = 30     # outcomes needed before drift can trigger a retrain
+DRIFT_WINDOW_ALPHA = 0.05   # decay of the running error window (~1/alpha recent outcomes)
+DRIFT_SKETCH_ALPHA = 0.005  # decay of the feature histograms (~400 effective outcomes)
+DRIFT_MIN_SAMPLES_PER_BIN = 10  # effective outcomes per bin before PSI is scored
+COMPANY_HISTORY_DIR = BASE_DIR / 'company_history'  # uploaded datasets and recorded outcomes
+
+# Model compaction (run after training when enabled, or via POST /compact/)
+COMPACTION_ENABLED = False
+COMPACTION_MAX_DEPTH = None          # regrow trees with this depth limit
+COMPACTION_MIN_SAMPLES_LEAF = 1      # regrow trees with larger leaves
+COMPACTION_FLOAT32 = True            # store thresholds and leaf values as float32
+COMPACTION_MAX_TREES = None          # keep at most this many trees, chosen by validation loss
+COMPACTION_MAX_ACCURACY_LOSS = 0.01  # largest allowed drop in held-out R² score
+
+# Worker warm-up at boot (see inference/warmup.py)
+WARMUP_ENABLED = False
+WARMUP_COMPANIES = {}  # company name -> path of its historical dataset CSV
+WARMUP_PRELOAD = False  # True under gunicorn --preload: workers warm up at fork, the master never does
+
+# Portfolio Monte Carlo (shared shocks are relative cost changes, one standard deviation)
+PORTFOLIO_SIMULATIONS = 5000
+PORTFOLIO_MAX_SIMULATIONS = 20000
+PORTFOLIO_MAX_BODY_BYTES = 32 * 1024 * 1024  # ~100k projects; larger bodies get 413
+PORTFOLIO_SHOCK_SD = {
+    'inflation': 0.03,       # applied to each project's predicted cost
+    'material_price': 0.12,  # applied to material cost
+    'labor': 0.06,           # applied to labour cost
+}
+PORTFOLIO_SHOCK_CORRELATION = [  # order: inflation, material_price, labor
+    [1.0, 0.5, 0.4],
+    [0.5, 1.0, 0.2],
+    [0.4, 0.2, 1.0],
+]
+PORTFOLIO_IDIOSYNCRATIC_SD = 0.08  # independent per-project noise
+
+# Multi-process serving: publish trained models as memory-mapped artifacts
+# shared read-only by all workers (see inference/artifacts.py)
+SHARED_MODELS_ENABLED = False
+SHARED_MODELS_DIR = BASE_DIR / 'model_artifacts'
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# Pre-load company models in the background when WARMUP_ENABLED is set
+from inference import warmup  # noqa: E402
+
+warmup.start()
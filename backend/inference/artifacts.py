@@ -0,0 +1,161 @@
+# inference/artifacts.py
+"""Shared, memory-mapped model artifacts for multi-process serving.
+
+A pickled forest loaded in every worker costs a full private copy per
+process, and even a forest inherited from a preloading master drifts out
+of copy-on-write as soon as reference counting touches its objects. Here a
+trained model is published once as a CompactForest whose node arrays are
+.npy files; workers open them with ``mmap_mode='r'`` so every process maps
+the same page-cache pages and adds next to nothing to its own RSS.
+
+Layout under SHARED_MODELS_DIR::
+
+    <company>/CURRENT.json           -> {"version": "..."}
+    <company>/<version>/*.npy        node arrays (immutable once published)
+    <company>/<version>/meta.json    features, categories, scores, analysis
+
+Publishing writes a new version directory under a temporary name, renames
+it into place and then swaps CURRENT.json with ``os.replace``, so readers
+see either the old model or the new one, never a partial write.
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+from .history import company_slug
+
+# Published versions kept per company besides the current one
+KEEP_PREVIOUS_VERSIONS = 1
+
+
+def _root():
+    return str(getattr(settings, 'SHARED_MODELS_DIR', settings.BASE_DIR / 'model_artifacts'))
+
+
+def _company_dir(company_name):
+    return os.path.join(_root(), company_slug(company_name))
+
+
+def _json_default(value):
+    # NumPy scalars from pandas summaries
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def publish(company_name, model_info, analysis):
+    """Write a company model as a new artifact version and make it current"""
+    import numpy as np
+    from .compaction import CompactForest
+
+    model = model_info['model']
+    if not isinstance(model, CompactForest):
+        # Lossless: float64 thresholds and missing-value routing keep predictions unchanged
+        model = CompactForest.from_estimators(model.estimators_, np.float64)
+
+    company_dir = _company_dir(company_name)
+    os.makedirs(company_dir, exist_ok=True)
+
+    version = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    staging = tempfile.mkdtemp(prefix='.staging-', dir=company_dir)
+
+    model.save(staging)
+    meta = {
+        'company_name': company_name,
+        'version': version,
+        'features': model_info['features'],
+        'categories': model_info.get('categories', {}),
+        'train_score': model_info.get('train_score'),
+        'test_score': model_info.get('test_score'),
+        'baseline_mae': model_info.get('baseline_mae'),
+        'baseline_mape': model_info.get('baseline_mape'),
+        'compaction': model_info.get('compaction'),
+        'analysis': analysis,
+    }
+    with open(os.path.join(staging, 'meta.json'), 'w') as f:
+        json.dump(meta, f, default=_json_default)
+
+    os.rename(staging, os.path.join(company_dir, version))
+
+    pointer = os.path.join(company_dir, 'CURRENT.json')
+    fd, temp_pointer = tempfile.mkstemp(prefix='.CURRENT-', dir=company_dir)
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'version': version}, f)
+    os.replace(temp_pointer, pointer)
+
+    _prune(company_dir, version)
+    print(f"📦 Published model {version} for {company_name}")
+    return version
+
+
+def _prune(company_dir, current_version):
+    # Version names sort by publish time; mapped files of removed versions stay valid until unmapped
+    versions = sorted(
+        name for name in os.listdir(company_dir)
+        if not name.startswith('.') and os.path.isdir(os.path.join(company_dir, name))
+    )
+    previous = [name for name in versions if name != current_version]
+    for name in previous[:max(len(previous) - KEEP_PREVIOUS_VERSIONS, 0)]:
+        shutil.rmtree(os.path.join(company_dir, name), ignore_errors=True)
+
+
+def current_version(company_name):
+    """Version currently published for a company, or None"""
+    try:
+        with open(os.path.join(_company_dir(company_name), 'CURRENT.json')) as f:
+            return json.load(f)['version']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def load(company_name, version):
+    """Memory-map a published version; returns ``(model_info, analysis)``"""
+    from .compaction import CompactForest
+
+    directory = os.path.join(_company_dir(company_name), version)
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+
+    model_info = {
+        'model': CompactForest.load(directory, mmap_mode='r'),
+        'features': meta['features'],
+        'categories': meta['categories'],
+        'train_score': meta['train_score'],
+        'test_score': meta['test_score'],
+        'baseline_mae': meta['baseline_mae'],
+        'baseline_mape': meta['baseline_mape'],
+        'artifact_version': version,
+    }
+    if meta.get('compaction'):
+        model_info['compaction'] = meta['compaction']
+
+    return model_info, meta['analysis']
+
+
+class SharedModelStore:
+    """Per-process view of the published artifacts, swapped when a new version appears"""
+
+    def __init__(self):
+        self.versions = {}
+        self.lock = threading.Lock()
+
+    def refresh(self, company_name):
+        """Return ``(model_info, analysis)`` if a newer version is published, else None"""
+        version = current_version(company_name)
+        if version is None or self.versions.get(company_name) == version:
+            return None
+
+        with self.lock:
+            if self.versions.get(company_name) == version:
+                return None
+            loaded = load(company_name, version)
+            self.versions[company_name] = version
+
+        print(f"🔄 Switched {company_name} to model {version}")
+        return loaded
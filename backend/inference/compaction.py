@@ -0,0 +1,268 @@
+# inference/compaction.py
+"""Compaction of trained company forests into small flat-array models.
+
+A fitted RandomForestRegressor keeps every tree as a separate object with
+float64 thresholds and values plus training-only bookkeeping (impurity,
+sample counts). CompactForest flattens the trees into a handful of NumPy
+arrays, optionally in float32, which pickles small and loads fast.
+"""
+import io
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import train_test_split
+
+
+class CompactForest:
+    """Flat-array forest that predicts the mean of its trees like sklearn"""
+
+    def __init__(self, left, right, feature, threshold, missing_left, value, roots, max_depth, n_features):
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+
+    @classmethod
+    def from_estimators(cls, estimators, dtype=np.float32):
+        """Flatten fitted DecisionTreeRegressors into shared node arrays"""
+        left, right, feature, threshold, missing_left, value, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in estimators:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == -1
+
+            roots.append(offset)
+            left.append(np.where(is_leaf, -1, tree.children_left + offset))
+            right.append(np.where(is_leaf, -1, tree.children_right + offset))
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            # Child that NaN inputs follow: learned from missing training values,
+            # otherwise the child that received more samples
+            missing_left.append(tree.missing_go_to_left.astype(bool) & ~is_leaf)
+            value.append(tree.value[:, 0, 0])
+
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        # sklearn compares float32 inputs against float64 thresholds. Rounding a
+        # threshold to nearest can land it on a feature value and flip X <= t,
+        # so narrow thresholds round down to the largest representable value <= t
+        threshold = np.concatenate(threshold)
+        narrowed = threshold.astype(dtype)
+        rounded_up = narrowed > threshold
+        narrowed[rounded_up] = np.nextafter(narrowed[rounded_up], dtype(-np.inf))
+
+        index_dtype = np.int32 if offset < np.iinfo(np.int32).max else np.int64
+        return cls(
+            left=np.concatenate(left).astype(index_dtype),
+            right=np.concatenate(right).astype(index_dtype),
+            feature=np.concatenate(feature).astype(np.int16),
+            threshold=narrowed,
+            missing_left=np.concatenate(missing_left),
+            value=np.concatenate(value).astype(dtype),
+            roots=np.asarray(roots, dtype=index_dtype),
+            max_depth=max_depth,
+            n_features=estimators[0].n_features_in_,
+        )
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self._arrays().values())
+
+    def _arrays(self):
+        return {
+            'left': self.left,
+            'right': self.right,
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'missing_left': self.missing_left,
+            'value': self.value,
+            'roots': self.roots,
+        }
+
+    def predict_trees(self, X):
+        """Per-tree predictions, shaped (n_samples, n_trees)"""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_estimators)).copy()
+
+        # Walk every (sample, tree) pair down one level per step
+        for _ in range(self.max_depth):
+            is_leaf = self.left[nodes] == -1
+            if is_leaf.all():
+                break
+            x = X[rows, self.feature[nodes]]
+            go_left = (x <= self.threshold[nodes]) | (np.isnan(x) & self.missing_left[nodes])
+            nodes = np.where(is_leaf, nodes, np.where(go_left, self.left[nodes], self.right[nodes]))
+
+        return self.value[nodes]
+
+    def predict(self, X):
+        return self.predict_trees(X).mean(axis=1, dtype=np.float64)
+
+    def score(self, X, y):
+        """Coefficient of determination, matching RandomForestRegressor.score"""
+        y = np.asarray(y, dtype=np.float64)
+        residual = ((y - self.predict(X)) ** 2).sum()
+        total = ((y - y.mean()) ** 2).sum()
+        return 1 - residual / total if total else 0.0
+
+    def to_bytes(self):
+        buffer = io.BytesIO()
+        np.savez(buffer, max_depth=self.max_depth, n_features=self.n_features, **self._arrays())
+        return buffer.getvalue()
+
+    def save(self, directory):
+        """Write the node arrays as .npy files that can be memory-mapped"""
+        for name, array in self._arrays().items():
+            np.save(os.path.join(directory, f'{name}.npy'), array)
+        with open(os.path.join(directory, 'forest.json'), 'w') as f:
+            json.dump({'max_depth': self.max_depth, 'n_features': self.n_features}, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Open a saved forest; with mmap_mode the arrays stay in the page cache"""
+        with open(os.path.join(directory, 'forest.json')) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in ['left', 'right', 'feature', 'threshold', 'missing_left', 'value', 'roots']
+        }
+        return cls(max_depth=meta['max_depth'], n_features=meta['n_features'], **arrays)
+
+    @classmethod
+    def from_bytes(cls, data):
+        arrays = np.load(io.BytesIO(data))
+        return cls(
+            left=arrays['left'],
+            right=arrays['right'],
+            feature=arrays['feature'],
+            threshold=arrays['threshold'],
+            missing_left=arrays['missing_left'],
+            value=arrays['value'],
+            roots=arrays['roots'],
+            max_depth=arrays['max_depth'],
+            n_features=arrays['n_features'],
+        )
+
+
+def select_trees(estimators, X_val, y_val, max_trees):
+    """Greedy forward selection of the trees that minimise validation MSE"""
+    X_val = np.asarray(X_val, dtype=np.float32)
+    y_val = np.asarray(y_val, dtype=np.float64)
+    tree_predictions = np.vstack([estimator.predict(X_val) for estimator in estimators])
+
+    selected = []
+    available = np.ones(len(estimators), dtype=bool)
+    running_sum = np.zeros_like(y_val)
+    best_loss, best_count = np.inf, 0
+
+    for step in range(min(max_trees, len(estimators))):
+        candidates = (running_sum + tree_predictions) / (step + 1)
+        losses = ((candidates - y_val) ** 2).mean(axis=1)
+        losses[~available] = np.inf
+
+        choice = int(np.argmin(losses))
+        selected.append(choice)
+        available[choice] = False
+        running_sum += tree_predictions[choice]
+
+        if losses[choice] < best_loss:
+            best_loss, best_count = losses[choice], len(selected)
+
+    return sorted(selected[:best_count])
+
+
+def compact_forest(model, X_train, y_train, X_test, y_test, max_depth=None,
+                   min_samples_leaf=1, use_float32=True, max_trees=None,
+                   max_accuracy_loss=0.01):
+    """Compact a fitted forest and report size, load-time and accuracy deltas
+
+    Returns ``(compact_model, report)``; ``compact_model`` is None when the
+    accuracy loss on the held-out split exceeds ``max_accuracy_loss``. The
+    held-out split is used only for that check, never to fit or select trees.
+    """
+    if max_trees is not None and max_trees < 1:
+        raise ValueError('max_trees must be at least 1')
+
+    pruning = max_depth is not None or min_samples_leaf > 1
+    selecting = max_trees is not None and max_trees < model.n_estimators
+
+    # The original forest has seen every training row, so trees are chosen on a
+    # validation slice carved from X_train that the regrown forest never sees;
+    # X_test stays reserved for the accuracy guard below
+    X_fit, y_fit = X_train, y_train
+    if selecting:
+        X_fit, X_val, y_fit, y_val = train_test_split(X_train, y_train, test_size=0.2, random_state=42)
+
+    # Pruning or holding rows out means regrowing the trees
+    source = model
+    if pruning or selecting:
+        params = model.get_params()
+        if pruning:
+            params.update(max_depth=max_depth, min_samples_leaf=min_samples_leaf)
+        source = RandomForestRegressor(**params)
+        source.fit(X_fit, y_fit)
+
+    estimators = source.estimators_
+    if selecting:
+        chosen = select_trees(estimators, X_val, y_val, max_trees)
+        estimators = [estimators[index] for index in chosen]
+
+    compact = CompactForest.from_estimators(estimators, np.float32 if use_float32 else np.float64)
+
+    original_bytes = pickle.dumps(model)
+    compact_bytes = compact.to_bytes()
+
+    start = time.perf_counter()
+    pickle.loads(original_bytes)
+    original_load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    CompactForest.from_bytes(compact_bytes)
+    compact_load = time.perf_counter() - start
+
+    original_score = float(model.score(X_test, y_test))
+    compact_score = float(compact.score(X_test, y_test))
+    accuracy_loss = original_score - compact_score
+
+    report = {
+        'original': {
+            'size_bytes': len(original_bytes),
+            'load_seconds': original_load,
+            'test_score': original_score,
+            'n_estimators': model.n_estimators,
+        },
+        'compacted': {
+            'size_bytes': len(compact_bytes),
+            'load_seconds': compact_load,
+            'test_score': compact_score,
+            'n_estimators': compact.n_estimators,
+            'max_depth': compact.max_depth,
+            'float32': use_float32,
+        },
+        'size_reduction_percent': (1 - len(compact_bytes) / len(original_bytes)) * 100,
+        'load_speedup': original_load / compact_load if compact_load else None,
+        'accuracy_loss': accuracy_loss,
+        'max_accuracy_loss': max_accuracy_loss,
+        'applied': bool(accuracy_loss <= max_accuracy_loss),
+    }
+
+    if not report['applied']:
+        return None, report
+    return compact, report
@@ -0,0 +1,123 @@
+# inference/history.py
+"""On-disk company history that retraining reads from.
+
+An uploaded dataset is written to ``<company>/history.csv`` under
+COMPANY_HISTORY_DIR, and ingested outcomes are appended to
+``<company>/outcomes.csv`` once per request. Nothing about outcomes grows in
+memory, and any process (not only the one that took the upload) can rebuild
+the full training set when a retrain is due. ``retrain_lock`` makes sure only
+one of those processes actually retrains a company at a time.
+"""
+import contextlib
+import csv
+import hashlib
+import os
+import re
+import tempfile
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are not locked across processes
+    fcntl = None
+
+
+def company_slug(company_name):
+    """Filesystem-safe, collision-resistant directory name for a company"""
+    slug = re.sub(r'[^A-Za-z0-9_-]+', '_', company_name).strip('_') or 'company'
+    digest = hashlib.sha1(company_name.encode('utf-8')).hexdigest()[:8]
+    return f'{slug}-{digest}'
+
+
+def company_dir(company_name):
+    root = str(getattr(settings, 'COMPANY_HISTORY_DIR', settings.BASE_DIR / 'company_history'))
+    return os.path.join(root, company_slug(company_name))
+
+
+def _history_path(company_name):
+    return os.path.join(company_dir(company_name), 'history.csv')
+
+
+def _outcomes_path(company_name):
+    return os.path.join(company_dir(company_name), 'outcomes.csv')
+
+
+def save_history(company_name, df):
+    """Replace a company's history with an uploaded dataset
+
+    Outcomes recorded against the previous history are discarded; the upload
+    is taken to be the company's complete record.
+    """
+    directory = company_dir(company_name)
+    os.makedirs(directory, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(prefix='.history-', suffix='.csv', dir=directory)
+    with os.fdopen(fd, 'w', newline='') as f:
+        df.to_csv(f, index=False)
+    os.replace(temp_path, _history_path(company_name))
+
+    try:
+        os.unlink(_outcomes_path(company_name))
+    except FileNotFoundError:
+        pass
+
+
+def has_history(company_name):
+    return os.path.exists(_history_path(company_name))
+
+
+def append_outcomes(company_name, rows, columns):
+    """Append completed projects to the company's outcome file in one write"""
+    directory = company_dir(company_name)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(_outcomes_path(company_name), 'a', newline='') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.seek(0, os.SEEK_END)
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+            if f.tell() == 0:
+                writer.writeheader()
+            writer.writerows(rows)
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def load_history(company_name):
+    """Uploaded history plus recorded outcomes, or None if nothing was uploaded"""
+    import pandas as pd
+
+    if not has_history(company_name):
+        return None
+
+    df = pd.read_csv(_history_path(company_name))
+    if os.path.exists(_outcomes_path(company_name)):
+        outcomes = pd.read_csv(_outcomes_path(company_name))
+        if not outcomes.empty:
+            df = pd.concat([df, outcomes], ignore_index=True)
+
+    return df
+
+
+@contextlib.contextmanager
+def retrain_lock(company_name):
+    """Non-blocking cross-process lock; yields False if another process holds it"""
+    directory = company_dir(company_name)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, 'retrain.lock'), 'a') as f:
+        if fcntl is None:
+            yield True
+            return
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,367 @@
+# inference/loadgen.py
+"""Synthetic traffic for load-testing the inference API.
+
+Used by ``python manage.py loadtest``. Requests arrive open-loop (Poisson
+arrivals at the target rate plus periodic /predict/ bursts), so a slow
+server builds up queueing delay instead of silently lowering the offered
+load. Latency is measured both from the moment a request is sent and from
+the moment it was scheduled.
+
+Three transports reach the same URLconf:
+    * ``http``  - a real server (runserver, gunicorn, uvicorn) over HTTP
+    * ``wsgi``  - in-process through Django's WSGI handler (test Client)
+    * ``asgi``  - in-process through Django's ASGI handler (AsyncClient)
+"""
+import asyncio
+import csv
+import io
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ENDPOINTS = {
+    'predict': '/api/inference/predict/',
+    'scenarios': '/api/inference/scenarios/',
+    'upload': '/api/inference/upload/',
+}
+
+DEFAULT_MIX = {'predict': 0.85, 'scenarios': 0.13, 'upload': 0.02}
+
+PROJECT_TYPES = ['Substation', 'Overhead Line', 'Underground Cable']
+REGIONS = ['North', 'South', 'East', 'West', 'North-East']
+
+HISTORY_COLUMNS = [
+    'project_type', 'project_size', 'project_duration', 'labor_cost', 'material_cost',
+    'equipment_cost', 'overhead_cost', 'inflation_rate', 'region', 'year', 'delays',
+    'rework_percent', 'safety_incidents', 'final_project_cost'
+]
+
+
+def synth_project(rng):
+    """A project carrying every field predict_cost requires, plus risk fields"""
+    size = rng.uniform(10, 500)
+    labor = size * rng.uniform(8000, 15000)
+    material = size * rng.uniform(15000, 30000)
+    equipment = size * rng.uniform(3000, 9000)
+    overhead = (labor + material + equipment) * rng.uniform(0.05, 0.12)
+
+    return {
+        'project_type': rng.choice(PROJECT_TYPES),
+        'project_size': round(size, 1),
+        'project_duration': rng.randint(6, 48),
+        'labor_cost': round(labor, 2),
+        'material_cost': round(material, 2),
+        'equipment_cost': round(equipment, 2),
+        'overhead_cost': round(overhead, 2),
+        'inflation_rate': round(rng.uniform(3, 8), 2),
+        'region': rng.choice(REGIONS),
+        'year': rng.randint(2018, 2026),
+        'delays': rng.randint(0, 30),
+        'rework_percent': round(rng.uniform(0, 10), 1),
+        'safety_incidents': rng.randint(0, 4),
+    }
+
+
+def synth_history_csv(rng, rows):
+    """CSV of completed projects in the format upload_company_data expects"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=HISTORY_COLUMNS)
+    writer.writeheader()
+
+    for _ in range(rows):
+        project = synth_project(rng)
+        base_cost = (project['labor_cost'] + project['material_cost'] +
+                     project['equipment_cost'] + project['overhead_cost'])
+        overrun = (1 + project['delays'] * 0.01 + project['rework_percent'] * 0.02 +
+                   project['safety_incidents'] * 0.03)
+        project['final_project_cost'] = round(base_cost * overrun * rng.gauss(1, 0.05), 2)
+        writer.writerow(project)
+
+    return buffer.getvalue().encode('utf-8')
+
+
+class HttpTransport:
+    """Sends requests to a running server over HTTP"""
+
+    def __init__(self, base_url, timeout=60):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _send(self, path, body, content_type):
+        request = urllib.request.Request(
+            self.base_url + path, data=body, method='POST',
+            headers={'Content-Type': content_type}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def post_json(self, path, payload):
+        return self._send(path, json.dumps(payload).encode('utf-8'), 'application/json')
+
+    def post_upload(self, path, company_name, csv_bytes):
+        boundary = uuid.uuid4().hex
+        body = (
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="company_name"\r\n\r\n'
+            f'{company_name}\r\n'
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="file"; filename="history.csv"\r\n'
+            f'Content-Type: text/csv\r\n\r\n'
+        ).encode('utf-8') + csv_bytes + f'\r\n--{boundary}--\r\n'.encode('utf-8')
+        return self._send(path, body, f'multipart/form-data; boundary={boundary}')
+
+    def close(self):
+        pass
+
+
+def _allow_test_host():
+    """Allow the 'testserver' host that Django's test clients send"""
+    from django.conf import settings
+    from django.test.utils import override_settings
+
+    overrides = override_settings(ALLOWED_HOSTS=list(settings.ALLOWED_HOSTS) + ['testserver'])
+    overrides.enable()
+    return overrides
+
+
+class WsgiTransport:
+    """Drives the app in-process through Django's WSGI handler"""
+
+    def __init__(self):
+        self.local = threading.local()
+        self.overrides = _allow_test_host()
+
+    def _client(self):
+        from django.test import Client
+
+        if not hasattr(self.local, 'client'):
+            self.local.client = Client()
+        return self.local.client
+
+    def post_json(self, path, payload):
+        response = self._client().post(
+            path, data=json.dumps(payload), content_type='application/json'
+        )
+        return response.status_code
+
+    def post_upload(self, path, company_name, csv_bytes):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        response = self._client().post(path, {
+            'company_name': company_name,
+            'file': SimpleUploadedFile('history.csv', csv_bytes, content_type='text/csv'),
+        })
+        return response.status_code
+
+    def close(self):
+        self.overrides.disable()
+
+
+class AsgiTransport:
+    """Drives the app in-process through Django's ASGI handler on its own event loop"""
+
+    def __init__(self):
+        from django.test import AsyncClient
+
+        self.overrides = _allow_test_host()
+        self.client = AsyncClient()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def post_json(self, path, payload):
+        response = self._run(self.client.post(
+            path, data=json.dumps(payload), content_type='application/json'
+        ))
+        return response.status_code
+
+    def post_upload(self, path, company_name, csv_bytes):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        response = self._run(self.client.post(path, {
+            'company_name': company_name,
+            'file': SimpleUploadedFile('history.csv', csv_bytes, content_type='text/csv'),
+        }))
+        return response.status_code
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        self.overrides.disable()
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(int(round(q * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def _latency_summary(values):
+    values = sorted(values)
+    return {
+        'p50_ms': _percentile(values, 0.50),
+        'p95_ms': _percentile(values, 0.95),
+        'p99_ms': _percentile(values, 0.99),
+        'max_ms': values[-1] if values else None,
+    }
+
+
+class LoadTest:
+    """Replays a traffic mix at a target request rate and collects latency statistics"""
+
+    def __init__(self, transport, company_name='LoadTest Company', mix=None, rps=20,
+                 duration=30, concurrency=32, burst_interval=0, burst_size=0,
+                 upload_rows=500, seed=None):
+        self.transport = transport
+        self.company_name = company_name
+        self.mix = mix or DEFAULT_MIX
+        self.rps = rps
+        self.duration = duration
+        self.concurrency = concurrency
+        self.burst_interval = burst_interval
+        self.burst_size = burst_size
+        self.upload_rows = upload_rows
+        self.rng = random.Random(seed)
+
+        self.lock = threading.Lock()
+        self.uploads_in_flight = 0
+        self.samples = {kind: [] for kind in ENDPOINTS}
+
+    def seed_company(self):
+        """Upload one history so /predict/ exercises the company model path"""
+        csv_bytes = synth_history_csv(self.rng, self.upload_rows)
+        return self.transport.post_upload(ENDPOINTS['upload'], self.company_name, csv_bytes)
+
+    def _payload(self, kind):
+        # Payloads are built on the dispatcher thread, which owns the RNG
+        if kind == 'upload':
+            return synth_history_csv(self.rng, self.upload_rows)
+        project = synth_project(self.rng)
+        project['company_name'] = self.company_name
+        return project
+
+    def _fire(self, kind, payload, scheduled):
+        started = time.perf_counter()
+
+        with self.lock:
+            during_training = self.uploads_in_flight > 0
+            if kind == 'upload':
+                self.uploads_in_flight += 1
+
+        try:
+            if kind == 'upload':
+                status = self.transport.post_upload(ENDPOINTS[kind], self.company_name, payload)
+            else:
+                status = self.transport.post_json(ENDPOINTS[kind], payload)
+        except Exception:
+            status = None
+        finally:
+            if kind == 'upload':
+                with self.lock:
+                    self.uploads_in_flight -= 1
+
+        finished = time.perf_counter()
+        sample = (
+            (finished - started) * 1000,
+            (finished - scheduled) * 1000,
+            status,
+            during_training,
+        )
+        with self.lock:
+            self.samples[kind].append(sample)
+
+    def _schedule(self):
+        """Arrival times and request kinds for the whole run"""
+        kinds = list(self.mix)
+        weights = [self.mix[kind] for kind in kinds]
+        arrivals = []
+
+        offset = self.rng.expovariate(self.rps) if self.rps else self.duration
+        while offset < self.duration:
+            arrivals.append((offset, self.rng.choices(kinds, weights)[0]))
+            offset += self.rng.expovariate(self.rps)
+
+        if self.burst_interval and self.burst_size:
+            burst_at = self.burst_interval
+            while burst_at < self.duration:
+                arrivals.extend((burst_at, 'predict') for _ in range(self.burst_size))
+                burst_at += self.burst_interval
+
+        return sorted(arrivals, key=lambda arrival: arrival[0])
+
+    def run(self):
+        arrivals = self._schedule()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        start = time.perf_counter()
+
+        for offset, kind in arrivals:
+            payload = self._payload(kind)
+            scheduled = start + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(self._fire, kind, payload, scheduled)
+
+        executor.shutdown(wait=True)
+        elapsed = time.perf_counter() - start
+        return self.report(elapsed, len(arrivals))
+
+    def report(self, elapsed, offered):
+        endpoints = {}
+        completed = 0
+
+        for kind, samples in self.samples.items():
+            if not samples:
+                continue
+            completed += len(samples)
+            errors = sum(1 for sample in samples if sample[2] is None or sample[2] >= 400)
+            status_counts = {}
+            for sample in samples:
+                status_counts[str(sample[2])] = status_counts.get(str(sample[2]), 0) + 1
+
+            endpoints[kind] = {
+                'requests': len(samples),
+                'throughput_rps': len(samples) / elapsed,
+                'errors': errors,
+                'error_rate': errors / len(samples),
+                'status_counts': status_counts,
+                'latency': _latency_summary([sample[0] for sample in samples]),
+                'latency_from_schedule': _latency_summary([sample[1] for sample in samples]),
+            }
+
+        predict = self.samples['predict']
+        contention = {
+            'predict_idle': _latency_summary([s[0] for s in predict if not s[3]]),
+            'predict_during_training': _latency_summary([s[0] for s in predict if s[3]]),
+            'predict_during_training_samples': sum(1 for s in predict if s[3]),
+        }
+
+        return {
+            'config': {
+                'target_rps': self.rps,
+                'duration_s': self.duration,
+                'concurrency': self.concurrency,
+                'mix': self.mix,
+                'burst_interval_s': self.burst_interval,
+                'burst_size': self.burst_size,
+            },
+            'elapsed_s': elapsed,
+            'offered_requests': offered,
+            'completed_requests': completed,
+            'throughput_rps': completed / elapsed if elapsed else 0,
+            'endpoints': endpoints,
+            'training_contention': contention,
+        }
@@ -0,0 +1,149 @@
+# inference/management/commands/loadtest.py
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from inference.loadgen import (
+    DEFAULT_MIX, ENDPOINTS, AsgiTransport, HttpTransport, LoadTest, WsgiTransport
+)
+
+
+def parse_mix(value):
+    """Parse 'predict=0.85,scenarios=0.13,upload=0.02' into weights"""
+    mix = {}
+    for part in value.split(','):
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in ENDPOINTS:
+            raise CommandError(f'Unknown endpoint in mix: {kind} (choose from {", ".join(ENDPOINTS)})')
+        try:
+            mix[kind] = float(weight)
+        except ValueError:
+            raise CommandError(f'Invalid weight for {kind}: {weight!r}')
+    if not any(mix.values()):
+        raise CommandError('Traffic mix needs at least one positive weight')
+    return mix
+
+
+class Command(BaseCommand):
+    help = 'Replay synthetic /predict/, /scenarios/ and upload traffic and report throughput and latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transport', choices=['wsgi', 'asgi', 'http'], default='wsgi',
+                            help='In-process WSGI/ASGI handler, or HTTP against --url')
+        parser.add_argument('--url', default='http://127.0.0.1:8000',
+                            help='Base URL of a running server (http transport)')
+        parser.add_argument('--rps', type=float, default=20, help='Target requests per second')
+        parser.add_argument('--duration', type=float, default=30, help='Test length in seconds')
+        parser.add_argument('--concurrency', type=int, default=32, help='Maximum requests in flight')
+        parser.add_argument('--mix', type=parse_mix,
+                            default=DEFAULT_MIX,
+                            help='Traffic mix, e.g. predict=0.85,scenarios=0.13,upload=0.02')
+        parser.add_argument('--burst-interval', type=float, default=0,
+                            help='Seconds between /predict/ bursts (0 disables bursts)')
+        parser.add_argument('--burst-size', type=int, default=0, help='Extra /predict/ requests per burst')
+        parser.add_argument('--company', default='LoadTest Company', help='Company name used in payloads')
+        parser.add_argument('--upload-rows', type=int, default=500, help='Projects per synthetic upload')
+        parser.add_argument('--no-seed-upload', action='store_true',
+                            help='Skip the initial upload that trains the company model')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible traffic')
+        parser.add_argument('--data-dir', default=None,
+                            help='Keep uploaded histories and published models under this directory '
+                                 'instead of COMPANY_HISTORY_DIR/SHARED_MODELS_DIR (wsgi and asgi transports)')
+        parser.add_argument('--json', dest='json_path', default=None, help='Also write the report to this file')
+
+    def handle(self, *args, **options):
+        overrides = None
+        if options['data_dir']:
+            if options['transport'] == 'http':
+                raise CommandError('--data-dir only applies to the wsgi and asgi transports')
+            # In-process uploads otherwise land in the configured, persistent directories
+            overrides = override_settings(
+                COMPANY_HISTORY_DIR=os.path.join(options['data_dir'], 'history'),
+                SHARED_MODELS_DIR=os.path.join(options['data_dir'], 'artifacts'),
+            )
+            overrides.enable()
+
+        try:
+            report = self.run_load_test(options)
+        finally:
+            if overrides:
+                overrides.disable()
+
+        self.print_report(report)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Report written to {options['json_path']}")
+
+    def run_load_test(self, options):
+        if options['transport'] == 'http':
+            transport = HttpTransport(options['url'])
+        elif options['transport'] == 'asgi':
+            transport = AsgiTransport()
+        else:
+            transport = WsgiTransport()
+
+        load_test = LoadTest(
+            transport,
+            company_name=options['company'],
+            mix=options['mix'],
+            rps=options['rps'],
+            duration=options['duration'],
+            concurrency=options['concurrency'],
+            burst_interval=options['burst_interval'],
+            burst_size=options['burst_size'],
+            upload_rows=options['upload_rows'],
+            seed=options['seed'],
+        )
+
+        try:
+            if not options['no_seed_upload']:
+                self.stdout.write(f"📊 Seeding {options['company']} with {options['upload_rows']} projects...")
+                status = load_test.seed_company()
+                if status != 200:
+                    raise CommandError(f'Seed upload failed with status {status}')
+
+            self.stdout.write(
+                f"🚀 {options['transport']} load test: {options['rps']} rps for {options['duration']}s"
+            )
+            return load_test.run()
+        finally:
+            transport.close()
+
+    def print_report(self, report):
+        def ms(value):
+            return f'{value:8.1f}' if value is not None else '       -'
+
+        self.stdout.write('')
+        self.stdout.write(
+            f"Completed {report['completed_requests']}/{report['offered_requests']} requests "
+            f"in {report['elapsed_s']:.1f}s ({report['throughput_rps']:.1f} rps)"
+        )
+        self.stdout.write(f"{'endpoint':<10} {'reqs':>6} {'rps':>7} {'err%':>6} "
+                          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'q-p99 ms':>8}")
+
+        for kind, stats in report['endpoints'].items():
+            latency = stats['latency']
+            self.stdout.write(
+                f"{kind:<10} {stats['requests']:>6} {stats['throughput_rps']:>7.1f} "
+                f"{stats['error_rate'] * 100:>6.1f} {ms(latency['p50_ms'])} {ms(latency['p95_ms'])} "
+                f"{ms(latency['p99_ms'])} {ms(latency['max_ms'])} "
+                f"{ms(stats['latency_from_schedule']['p99_ms'])}"
+            )
+
+        contention = report['training_contention']
+        self.stdout.write('')
+        self.stdout.write('Training contention (/predict/ latency):')
+        self.stdout.write(
+            f"  idle            p50 {ms(contention['predict_idle']['p50_ms'])}  "
+            f"p95 {ms(contention['predict_idle']['p95_ms'])}"
+        )
+        self.stdout.write(
+            f"  during upload   p50 {ms(contention['predict_during_training']['p50_ms'])}  "
+            f"p95 {ms(contention['predict_during_training']['p95_ms'])}  "
+            f"({contention['predict_during_training_samples']} requests)"
+        )
@@ -0,0 +1,293 @@
+# inference/monitoring.py
+"""Constant-memory accuracy and drift monitoring for company models.
+
+Nothing in here keeps individual predictions around: every outcome is folded
+into fixed-size accumulators (running sums, P² quantile markers and
+exponentially decayed histograms) as soon as it arrives.
+"""
+import math
+
+# Quantiles tracked for the absolute percentage error
+ERROR_QUANTILES = (0.5, 0.9, 0.95)
+
+# Quantiles used to cut the training distribution of a numeric feature into bins
+BASELINE_BIN_QUANTILES = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+
+PSI_EPSILON = 1e-4
+
+# PSI is only scored once the window holds this many effective samples per bin;
+# below that, sampling noise alone (expected PSI ~ (bins - 1) / samples) exceeds
+# any sensible threshold
+MIN_SAMPLES_PER_BIN = 10
+
+
+class P2Quantile:
+    """Streaming quantile estimate using the P² algorithm (five markers)"""
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self.heights = []
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        self.count += 1
+        if self.count <= 5:
+            self.heights.append(x)
+            self.heights.sort()
+            return
+
+        q = self.heights
+        n = self.positions
+
+        # Find the cell the observation falls into and stretch the extremes
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while k < 3 and x >= q[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Nudge the three middle markers towards their desired positions
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = self._parabolic(i, d)
+                if q[i - 1] < candidate < q[i + 1]:
+                    q[i] = candidate
+                else:
+                    q[i] = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q = self.heights
+        n = self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self):
+        if not self.heights:
+            return None
+        if self.count <= 5:
+            index = min(int(round(self.p * (len(self.heights) - 1))), len(self.heights) - 1)
+            return self.heights[index]
+        return self.heights[2]
+
+
+class RunningErrorStats:
+    """Running MAE/MAPE, bias and error quantiles without storing predictions"""
+
+    def __init__(self, window_alpha):
+        self.window_alpha = window_alpha
+        self.count = 0
+        self.pct_count = 0
+        self.sum_abs_error = 0.0
+        self.sum_error = 0.0
+        self.sum_pct_error = 0.0
+        self.window_mae = None
+        self.window_mape = None
+        self.pct_quantiles = {q: P2Quantile(q) for q in ERROR_QUANTILES}
+
+    def add(self, predicted, actual):
+        error = predicted - actual
+        abs_error = abs(error)
+
+        self.count += 1
+        self.sum_error += error
+        self.sum_abs_error += abs_error
+        self.window_mae = self._decay(self.window_mae, abs_error)
+
+        # Percentage errors are undefined for zero-cost outcomes
+        if actual:
+            pct_error = abs_error / abs(actual) * 100
+            self.pct_count += 1
+            self.sum_pct_error += pct_error
+            self.window_mape = self._decay(self.window_mape, pct_error)
+            for estimator in self.pct_quantiles.values():
+                estimator.add(pct_error)
+
+    def _decay(self, current, value):
+        if current is None:
+            return value
+        return (1 - self.window_alpha) * current + self.window_alpha * value
+
+    def summary(self):
+        return {
+            'outcomes': self.count,
+            'mae': self.sum_abs_error / self.count if self.count else None,
+            'mape': self.sum_pct_error / self.pct_count if self.pct_count else None,
+            'bias': self.sum_error / self.count if self.count else None,
+            'window_mae': self.window_mae,
+            'window_mape': self.window_mape,
+            'ape_quantiles': {
+                f'p{int(q * 100)}': estimator.value()
+                for q, estimator in self.pct_quantiles.items()
+            },
+        }
+
+
+class FeatureSketch:
+    """Exponentially decayed histogram of a feature over the training bins"""
+
+    def __init__(self, baseline, window_alpha):
+        self.kind = baseline['kind']
+        self.window_alpha = window_alpha
+        if self.kind == 'numeric':
+            self.edges = baseline['edges']
+        else:
+            self.categories = list(baseline['categories'])
+        self.expected = baseline['proportions']
+        self.counts = [0.0] * len(self.expected)
+        self.sum_sq_weights = 0.0
+
+    def _bin(self, value):
+        if self.kind == 'numeric':
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                return None
+            if math.isnan(value):
+                return None
+            index = 0
+            while index < len(self.edges) and value > self.edges[index]:
+                index += 1
+            return index
+
+        value = str(value)
+        if value in self.categories:
+            return self.categories.index(value)
+        return len(self.categories)
+
+    def add(self, value):
+        index = self._bin(value)
+        if index is None:
+            return
+        decay = 1 - self.window_alpha
+        self.counts = [count * decay for count in self.counts]
+        self.counts[index] += 1
+        self.sum_sq_weights = self.sum_sq_weights * decay * decay + 1
+
+    def effective_samples(self):
+        """Kish effective sample size of the decayed window"""
+        total = sum(self.counts)
+        return total * total / self.sum_sq_weights if self.sum_sq_weights else 0.0
+
+    def psi(self, min_samples_per_bin=MIN_SAMPLES_PER_BIN):
+        """Population stability index of the live window against training
+
+        None until the window is large enough for PSI to be told apart from noise.
+        """
+        total = sum(self.counts)
+        if not total or self.effective_samples() < min_samples_per_bin * len(self.expected):
+            return None
+        psi = 0.0
+        for expected, count in zip(self.expected, self.counts):
+            expected = max(expected, PSI_EPSILON)
+            actual = max(count / total, PSI_EPSILON)
+            psi += (actual - expected) * math.log(actual / expected)
+        return psi
+
+
+def build_feature_baseline(df, feature_columns):
+    """Summarise the training distribution of each feature into fixed bins"""
+    baseline = {}
+
+    for column in feature_columns:
+        if column not in df.columns:
+            continue
+        series = df[column].dropna()
+        if series.empty:
+            continue
+
+        if series.dtype.kind not in 'biuf':
+            shares = series.astype(str).value_counts(normalize=True)
+            baseline[column] = {
+                'kind': 'categorical',
+                'categories': list(shares.index),
+                'proportions': [float(share) for share in shares.values] + [0.0],
+            }
+            continue
+
+        edges = sorted(set(float(edge) for edge in series.quantile(BASELINE_BIN_QUANTILES)))
+        counts = [0] * (len(edges) + 1)
+        for value in series:
+            index = 0
+            while index < len(edges) and value > edges[index]:
+                index += 1
+            counts[index] += 1
+
+        baseline[column] = {
+            'kind': 'numeric',
+            'edges': edges,
+            'proportions': [count / len(series) for count in counts],
+        }
+
+    return baseline
+
+
+class CompanyMonitor:
+    """Accuracy and drift state for one company's model against its training baseline"""
+
+    def __init__(self, feature_baseline, baseline_mae, baseline_mape, window_alpha=0.05,
+                 sketch_alpha=0.005):
+        self.baseline_mae = baseline_mae
+        self.baseline_mape = baseline_mape
+        self.errors = RunningErrorStats(window_alpha)
+        # Feature histograms need a much longer window than the error average
+        # to estimate ten bin shares with any precision
+        self.sketches = {
+            feature: FeatureSketch(baseline, sketch_alpha)
+            for feature, baseline in feature_baseline.items()
+        }
+
+    def observe(self, project_data, predicted_cost, actual_cost):
+        self.errors.add(predicted_cost, actual_cost)
+        for feature, sketch in self.sketches.items():
+            if feature in project_data:
+                sketch.add(project_data[feature])
+
+    def drift_report(self, psi_threshold, mape_ratio, min_outcomes,
+                     min_samples_per_bin=MIN_SAMPLES_PER_BIN):
+        errors = self.errors.summary()
+        feature_psi = {
+            feature: sketch.psi(min_samples_per_bin)
+            for feature, sketch in self.sketches.items()
+        }
+        drifted_features = [
+            feature for feature, psi in feature_psi.items()
+            if psi is not None and psi > psi_threshold
+        ]
+
+        accuracy_degraded = (
+            errors['window_mape'] is not None and
+            self.baseline_mape is not None and
+            errors['window_mape'] > self.baseline_mape * mape_ratio
+        )
+
+        enough_outcomes = errors['outcomes'] >= min_outcomes
+
+        return {
+            'baseline': {
+                'mae': self.baseline_mae,
+                'mape': self.baseline_mape,
+            },
+            'live': errors,
+            'feature_psi': feature_psi,
+            'drifted_features': drifted_features,
+            'accuracy_degraded': accuracy_degraded,
+            'drift_detected': enough_outcomes and (accuracy_degraded or bool(drifted_features)),
+        }
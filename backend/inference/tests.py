@@ -1,3 +1,567 @@
-from django.test import TestCase
+import io
+import json
+import os
+import random
+import tempfile
+import time
+import unittest
+from collections import Counter
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
+
+from . import artifacts, compaction, history, warmup
+from .loadgen import LoadTest, synth_history_csv, synth_project
+from .management.commands.loadtest import parse_mix
+from .monitoring import CompanyMonitor, P2Quantile, build_feature_baseline
+from .views import FEATURE_COLUMNS, CompanyDataPredictor, predictor
+
+
+def post_json(client, path, body):
+    return client.post(
+        path, json.dumps(body), content_type='application/json', headers={'host': 'localhost'}
+    )
+
+
+class CompanyHistoryMixin:
+    """Synthetic company history in temporary storage, for tests that train models"""
+    company_name = 'Test Co'
+    history_rows = 300
+    seed = 0
+    settings_overrides = {}
+
+    def setUp(self):
+        super().setUp()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        overrides = override_settings(
+            COMPANY_HISTORY_DIR=os.path.join(root.name, 'history'),
+            SHARED_MODELS_DIR=os.path.join(root.name, 'artifacts'),
+            **self.settings_overrides
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.rng = random.Random(self.seed)
+        self.history_path = os.path.join(root.name, 'upload.csv')
+        with open(self.history_path, 'wb') as f:
+            f.write(synth_history_csv(self.rng, self.history_rows))
+
+    def load_history(self, worker=predictor):
+        self.assertTrue(worker.load_company_dataset(self.history_path, self.company_name))
+
+
+class PortfolioAnalysisTests(SimpleTestCase):
+    def post(self, body):
+        return post_json(self.client, '/api/inference/portfolio/', body)
+
+    def test_large_portfolio_is_accepted(self):
+        rng = random.Random(1)
+        projects = [synth_project(rng) for _ in range(10000)]
+
+        response = self.post({'projects': projects, 'simulations': 500, 'seed': 1})
+
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual(result['portfolio']['projects'], 10000)
+        portfolio = result['monte_carlo']['portfolio']
+        self.assertLess(portfolio['p50_budget'], portfolio['p90_budget'])
+
+    @override_settings(PORTFOLIO_MAX_BODY_BYTES=1000)
+    def test_oversized_portfolio_is_rejected(self):
+        rng = random.Random(1)
+        response = self.post({'projects': [synth_project(rng) for _ in range(50)]})
+
+        self.assertEqual(response.status_code, 413)
+
+    def test_simulation_count_is_validated(self):
+        rng = random.Random(1)
+        projects = [synth_project(rng) for _ in range(5)]
+
+        for simulations in (0, -10, 'many'):
+            response = self.post({'projects': projects, 'simulations': simulations})
+            self.assertEqual(response.status_code, 400, simulations)
+
+
+class CompanyPortfolioTests(CompanyHistoryMixin, SimpleTestCase):
+    company_name = 'Portfolio Test Co'
+    history_rows = 600
+    seed = 13
+
+    def setUp(self):
+        super().setUp()
+        self.load_history()
+
+    def mixed_projects(self, count):
+        """Projects where every other one omits the optional risk fields"""
+        projects = []
+        for index in range(count):
+            project = synth_project(self.rng)
+            if index % 2:
+                for field in ['delays', 'rework_percent', 'safety_incidents', 'inflation_rate']:
+                    del project[field]
+            projects.append(project)
+        return projects
+
+    def test_batch_matches_single_project_predictions(self):
+        projects = self.mixed_projects(20)
+
+        batch = predictor.predict_batch_with_company_data(self.company_name, projects)
+        single = [predictor.predict_with_company_data(self.company_name, project) for project in projects]
+
+        np.testing.assert_allclose(batch, single, rtol=1e-12)
+
+    def test_portfolio_is_scored_with_company_model(self):
+        projects = self.mixed_projects(300)
+        single = [predictor.predict_with_company_data(self.company_name, project) for project in projects]
+
+        response = post_json(self.client, '/api/inference/portfolio/', {
+            'company_name': self.company_name, 'projects': projects,
+            'simulations': 500, 'seed': 1
+        })
+
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual(result['company_used'], self.company_name)
+
+        portfolio = result['portfolio']
+        self.assertSumsTo(single, portfolio['predicted_cost'])
+        for rollup in ('by_region', 'by_year'):
+            groups = portfolio[rollup]
+            self.assertEqual(sum(group['projects'] for group in groups), len(projects))
+            self.assertSumsTo([group['predicted_cost'] for group in groups], portfolio['predicted_cost'])
+            self.assertSumsTo([group['base_cost'] for group in groups], portfolio['base_cost'])
+
+            simulated = result['monte_carlo'][rollup]
+            self.assertSumsTo([group['expected_cost'] for group in simulated], portfolio['predicted_cost'])
+
+    def assertSumsTo(self, values, total):
+        self.assertAlmostEqual(sum(values) / total, 1, places=9)
+
+
+class P2QuantileTests(SimpleTestCase):
+    def test_matches_exact_quantiles(self):
+        rng = np.random.default_rng(0)
+        values = rng.lognormal(mean=1.0, sigma=0.8, size=20000)
+
+        for p in (0.5, 0.9, 0.95):
+            estimator = P2Quantile(p)
+            for value in values:
+                estimator.add(value)
+            exact = np.quantile(values, p)
+            self.assertAlmostEqual(estimator.value() / exact, 1, delta=0.03)
+
+    def test_small_samples_use_exact_order_statistics(self):
+        estimator = P2Quantile(0.5)
+        for value in [5, 1, 3]:
+            estimator.add(value)
+        self.assertEqual(estimator.value(), 3)
+
+
+class DriftMonitorTests(SimpleTestCase):
+    def setUp(self):
+        self.rng = random.Random(7)
+        history = pd.read_csv(io.BytesIO(synth_history_csv(self.rng, 2000)))
+        self.baseline = build_feature_baseline(history, FEATURE_COLUMNS)
+
+    def monitor(self):
+        return CompanyMonitor(self.baseline, baseline_mae=1.0, baseline_mape=5.0)
+
+    def feed(self, monitor, outcomes, shift=None):
+        for _ in range(outcomes):
+            project = synth_project(self.rng)
+            if shift:
+                shift(project)
+            actual = 1_000_000.0
+            monitor.observe(project, actual * self.rng.uniform(0.95, 1.05), actual)
+
+    def report(self, monitor):
+        return monitor.drift_report(psi_threshold=0.2, mape_ratio=1.5, min_outcomes=30)
+
+    def test_in_distribution_outcomes_do_not_trigger_drift(self):
+        for outcomes in (60, 200, 1000):
+            monitor = self.monitor()
+            self.feed(monitor, outcomes)
+
+            report = self.report(monitor)
+            self.assertEqual(report['drifted_features'], [], outcomes)
+            self.assertFalse(report['drift_detected'], outcomes)
+
+    def test_shifted_feature_triggers_drift(self):
+        monitor = self.monitor()
+
+        def inflate_materials(project):
+            project['material_cost'] *= 3
+
+        self.feed(monitor, 1000, shift=inflate_materials)
+
+        report = self.report(monitor)
+        self.assertIn('material_cost', report['drifted_features'])
+        self.assertTrue(report['drift_detected'])
+
+    def test_degraded_accuracy_triggers_drift(self):
+        monitor = self.monitor()
+        for _ in range(60):
+            monitor.observe(synth_project(self.rng), 1_300_000.0, 1_000_000.0)
+
+        report = self.report(monitor)
+        self.assertTrue(report['accuracy_degraded'])
+        self.assertTrue(report['drift_detected'])
+
+
+class OutcomeIngestTests(CompanyHistoryMixin, SimpleTestCase):
+    company_name = 'Outcome Test Co'
+    seed = 3
+
+    def setUp(self):
+        super().setUp()
+        self.load_history()
+
+    def test_outcomes_go_to_disk_not_memory(self):
+        outcomes = []
+        for _ in range(25):
+            project = synth_project(self.rng)
+            project['actual_cost'] = 1_000_000.0
+            outcomes.append(project)
+
+        response = post_json(self.client, '/api/inference/outcomes/', {
+            'company_name': self.company_name, 'outcomes': outcomes
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['monitoring']['live']['outcomes'], 25)
+        self.assertEqual(len(predictor.company_data[self.company_name]), 300)
+
+        retraining_set = history.load_history(self.company_name)
+        self.assertEqual(len(retraining_set), 325)
+        self.assertEqual(retraining_set['final_project_cost'].iloc[-1], 1_000_000.0)
+
+        # A retrain rebuilds the training set from disk
+        predictor._run_retrain(self.company_name)
+        self.assertEqual(len(predictor.company_data[self.company_name]), 325)
+
+    def test_invalid_outcomes_are_rejected(self):
+        project = synth_project(self.rng)
+        bad_requests = [
+            {'company_name': self.company_name, 'actual_cost': 5},
+            {'company_name': self.company_name, 'outcomes': dict(project, actual_cost=1_000_000.0)},
+            {'company_name': self.company_name, 'outcomes': []},
+        ]
+        for actual_cost in (0, -1_000_000.0, '1000000', True, None):
+            bad_requests.append({
+                'company_name': self.company_name, 'outcomes': [dict(project, actual_cost=actual_cost)]
+            })
+
+        for body in bad_requests:
+            response = post_json(self.client, '/api/inference/outcomes/', body)
+            self.assertEqual(response.status_code, 400, body)
+
+        self.assertEqual(predictor.get_drift_report(self.company_name)['live']['outcomes'], 0)
+        self.assertEqual(len(history.load_history(self.company_name)), 300)
+
+
+class CompactionTests(SimpleTestCase):
+    def setUp(self):
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.model_selection import train_test_split
+
+        rng = np.random.default_rng(11)
+        X = pd.DataFrame(rng.normal(size=(600, 5)), columns=list('abcde'))
+        y = 3 * X['a'] - 2 * X['b'] ** 2 + X['c'] * X['d'] + rng.normal(scale=0.1, size=600)
+        self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42
+        )
+        self.model = RandomForestRegressor(n_estimators=30, random_state=42, n_jobs=-1)
+        self.model.fit(self.X_train, self.y_train)
+
+    def test_tree_selection_never_sees_test_split(self):
+        with mock.patch.object(compaction, 'select_trees', wraps=compaction.select_trees) as select:
+            _, report = compaction.compact_forest(
+                self.model, self.X_train, self.y_train, self.X_test, self.y_test,
+                max_trees=10, max_accuracy_loss=1.0
+            )
+
+        X_val = select.call_args[0][1]
+        self.assertTrue(set(X_val.index) <= set(self.X_train.index))
+        self.assertFalse(set(X_val.index) & set(self.X_test.index))
+        self.assertLessEqual(report['compacted']['n_estimators'], 10)
+
+
+class CompactForestTests(SimpleTestCase):
+    def setUp(self):
+        from sklearn.ensemble import RandomForestRegressor
+
+        # Cost-scale features, where float32 spacing is coarser than the data
+        history_df = pd.read_csv(io.BytesIO(synth_history_csv(random.Random(5), 800)))
+        self.X = predictor.prepare_features(history_df)
+        self.y = history_df['final_project_cost']
+        self.model = RandomForestRegressor(n_estimators=20, random_state=42, n_jobs=-1)
+        self.model.fit(self.X, self.y)
+
+    def test_float64_matches_random_forest(self):
+        compact = compaction.CompactForest.from_estimators(self.model.estimators_, np.float64)
+        np.testing.assert_allclose(compact.predict(self.X), self.model.predict(self.X), rtol=1e-12)
+
+        # Blank outcome fields reach the model as NaN and must follow sklearn's missing-value child
+        X_missing = self.X.copy()
+        for offset, column in enumerate(['delays', 'inflation_rate', 'labor_cost', 'rework_percent']):
+            X_missing.loc[X_missing.index[offset::4], column] = np.nan
+        np.testing.assert_allclose(compact.predict(X_missing), self.model.predict(X_missing), rtol=1e-12)
+
+    def test_float32_keeps_split_decisions(self):
+        compact = compaction.CompactForest.from_estimators(self.model.estimators_, np.float32)
+        np.testing.assert_allclose(compact.predict(self.X), self.model.predict(self.X), rtol=1e-6)
+
+    def test_saved_forest_round_trips_through_mmap(self):
+        compact = compaction.CompactForest.from_estimators(self.model.estimators_, np.float32)
+        with tempfile.TemporaryDirectory() as directory:
+            compact.save(directory)
+            loaded = compaction.CompactForest.load(directory, mmap_mode='r')
+            np.testing.assert_array_equal(loaded.predict(self.X), compact.predict(self.X))
+            del loaded
+
+
+class CompactCompanyModelTests(CompanyHistoryMixin, SimpleTestCase):
+    company_name = 'Compaction Test Co'
+    history_rows = 400
+    seed = 9
+
+    def setUp(self):
+        super().setUp()
+        self.load_history()
+
+    def test_compaction_refreshes_baselines_and_monitor(self):
+        original_monitor = predictor.company_monitors[self.company_name]
+
+        report = predictor.compact_company_model(self.company_name, max_depth=4, max_accuracy_loss=1.0)
+
+        self.assertTrue(report['applied'])
+        model_info = predictor.company_models[self.company_name]
+        X_train, X_test, y_train, y_test = predictor.split_company_data(self.company_name)
+        expected_mae, expected_mape = predictor.baseline_errors(model_info['model'], X_test, y_test)
+        self.assertEqual(model_info['baseline_mae'], expected_mae)
+        self.assertEqual(model_info['test_score'], report['compacted']['test_score'])
+
+        self.assertEqual(model_info['train_score'], model_info['model'].score(X_train, y_train))
+
+        monitor = predictor.company_monitors[self.company_name]
+        self.assertIsNot(monitor, original_monitor)
+        self.assertEqual(monitor.baseline_mape, expected_mape)
+
+    def test_compaction_losing_too_much_accuracy_is_refused(self):
+        original = dict(predictor.company_models[self.company_name])
+        original_monitor = predictor.company_monitors[self.company_name]
+
+        report = predictor.compact_company_model(self.company_name, max_depth=1, max_accuracy_loss=0.0)
+
+        self.assertFalse(report['applied'])
+        self.assertGreater(report['accuracy_loss'], report['max_accuracy_loss'])
+        self.assertEqual(predictor.company_models[self.company_name], original)
+        self.assertIs(predictor.company_monitors[self.company_name], original_monitor)
+
+    def test_compact_view_validates_and_refuses_recompaction(self):
+        def compact(**options):
+            body = dict(options, company_name=self.company_name)
+            return post_json(self.client, '/api/inference/compact/', body)
+
+        for options in ({'max_trees': 0}, {'max_depth': -1}, {'min_samples_leaf': None}, {'max_trees': 2.5}):
+            self.assertEqual(compact(**options).status_code, 400, options)
+
+        first = compact(max_depth=12, max_trees=20, max_accuracy_loss=1.0)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.json()['success'])
+
+        second = compact(max_accuracy_loss=1.0)
+        self.assertEqual(second.status_code, 409)
+        self.assertEqual(second.json()['compaction'], first.json()['compaction'])
+
+
+class SharedModeRetrainTests(CompanyHistoryMixin, SimpleTestCase):
+    company_name = 'Shared Retrain Co'
+    seed = 21
+    settings_overrides = {'SHARED_MODELS_ENABLED': True}
+
+    def setUp(self):
+        super().setUp()
+
+        # Two workers: one takes the upload, the other only maps the artifact
+        self.uploader = CompanyDataPredictor()
+        self.other = CompanyDataPredictor()
+        self.load_history(self.uploader)
+        self.other.sync_shared_model(self.company_name)
+
+    def wait_for_retrain(self, worker):
+        deadline = time.time() + 60
+        while worker.retrain_pending and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertFalse(worker.retrain_pending)
+
+    def test_workers_serve_one_memory_mapped_copy(self):
+        served = [
+            worker.company_models[self.company_name]['model']
+            for worker in (self.uploader, self.other)
+        ]
+
+        for name, array in served[0]._arrays().items():
+            self.assertIsInstance(array, np.memmap, name)
+            self.assertIsInstance(getattr(served[1], name), np.memmap, name)
+            self.assertEqual(array.filename, getattr(served[1], name).filename)
+
+        self.assertNotIn('estimators_', vars(served[0]))
+
+    def test_drift_seen_by_non_uploading_worker_retrains(self):
+        self.assertNotIn(self.company_name, self.other.company_data)
+        first_version = artifacts.current_version(self.company_name)
+
+        outcomes = []
+        for _ in range(60):
+            project = synth_project(self.rng)
+            project['predicted_cost'] = 1_000_000.0
+            project['actual_cost'] = 2_000_000.0
+            outcomes.append(project)
+        report = self.other.record_outcomes(self.company_name, outcomes)
+
+        self.assertTrue(report['drift_detected'])
+        self.assertTrue(report['retrain_scheduled'])
+        self.wait_for_retrain(self.other)
+
+        second_version = artifacts.current_version(self.company_name)
+        self.assertNotEqual(second_version, first_version)
+        self.assertEqual(len(self.other.company_data[self.company_name]), 360)
+
+        # The uploading worker swaps to the retrained artifact
+        self.uploader.sync_shared_model(self.company_name)
+        self.assertEqual(
+            self.uploader.company_models[self.company_name]['artifact_version'], second_version
+        )
+
+    def test_only_one_process_retrains_at_a_time(self):
+        first_version = artifacts.current_version(self.company_name)
+
+        with history.retrain_lock(self.company_name) as acquired:
+            self.assertTrue(acquired)
+            self.other.schedule_retrain(self.company_name)
+            self.wait_for_retrain(self.other)
+
+        self.assertEqual(artifacts.current_version(self.company_name), first_version)
+
+
+class WarmupTests(SimpleTestCase):
+    def setUp(self):
+        saved = dict(warmup._state)
+        self.addCleanup(warmup._state.update, saved)
+
+    def wait_until_ready(self):
+        deadline = time.time() + 30
+        while not warmup.status()['ready'] and time.time() < deadline:
+            time.sleep(0.05)
+        return warmup.status()
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'needs os.fork')
+    @override_settings(WARMUP_ENABLED=True, WARMUP_PRELOAD=True, WARMUP_COMPANIES={})
+    def test_preloading_master_leaves_warmup_to_forked_workers(self):
+        warmup._state.update(pid=None, started=False, finished=False)
+        with mock.patch.object(warmup.threading, 'Thread') as thread:
+            warmup.start()
+        self.assertEqual(thread.call_count, 0)
+
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            # Worker: warm-up is already running at birth, before any request or probe
+            try:
+                os.close(read_end)
+                started = warmup._state['started'] and warmup._state['pid'] == os.getpid()
+                ready = self.wait_until_ready()['ready']
+                os.write(write_end, json.dumps({'started': started, 'ready': ready}).encode())
+            finally:
+                os._exit(0)
+
+        os.close(write_end)
+        with os.fdopen(read_end) as f:
+            result = json.loads(f.read() or '{}')
+        os.waitpid(pid, 0)
+
+        self.assertEqual(result, {'started': True, 'ready': True})
+        self.assertFalse(warmup._state['started'])
+
+    @override_settings(WARMUP_ENABLED=True, WARMUP_COMPANIES={})
+    def test_warmup_runs_once_per_process(self):
+        warmup._state.update(pid=None, started=False, finished=False)
+        with mock.patch.object(warmup.threading, 'Thread') as thread:
+            warmup.start()
+            warmup.start()
+        self.assertEqual(thread.call_count, 1)
+
+
+class LoadTestTests(SimpleTestCase):
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix('predict=0.9, upload=0.1'), {'predict': 0.9, 'upload': 0.1})
+
+        for value in ('predict=0.9,train=0.1', 'predict=lots', 'predict=0,upload=0'):
+            with self.assertRaises(CommandError, msg=value):
+                parse_mix(value)
+
+    def test_schedule_matches_rate_and_bursts(self):
+        load_test = LoadTest(None, rps=50, duration=20, burst_interval=5, burst_size=10, seed=1)
+
+        arrivals = load_test._schedule()
+
+        offsets = [offset for offset, _ in arrivals]
+        self.assertEqual(offsets, sorted(offsets))
+        self.assertTrue(all(0 <= offset < 20 for offset in offsets))
+
+        bursts = {offset: count for offset, count in Counter(offsets).items() if count > 1}
+        self.assertEqual(bursts, {5: 10, 10: 10, 15: 10})
+        self.assertTrue(all(kind == 'predict' for offset, kind in arrivals if offset in bursts))
+
+        # Poisson arrivals: 1000 expected, standard deviation about 32
+        self.assertAlmostEqual(len(arrivals) - 30, 1000, delta=130)
+
+    def test_report_counts_errors_and_statuses(self):
+        load_test = LoadTest(None)
+        load_test.samples['predict'] = [
+            (10.0, 12.0, 200, False),
+            (20.0, 25.0, 500, True),
+            (30.0, 31.0, None, False),
+            (40.0, 44.0, 200, True),
+        ]
+
+        report = load_test.report(elapsed=2.0, offered=5)
+
+        predict = report['endpoints']['predict']
+        self.assertEqual(predict['errors'], 2)
+        self.assertEqual(predict['error_rate'], 0.5)
+        self.assertEqual(predict['status_counts'], {'200': 2, '500': 1, 'None': 1})
+        self.assertEqual(predict['throughput_rps'], 2.0)
+        self.assertEqual(predict['latency']['max_ms'], 40.0)
+        self.assertNotIn('upload', report['endpoints'])
+        self.assertEqual(report['completed_requests'], 4)
+        self.assertEqual(report['training_contention']['predict_during_training_samples'], 2)
+
+    def test_command_runs_in_process(self):
+        with tempfile.TemporaryDirectory() as root:
+            configured = os.path.join(root, 'configured')
+            data_dir = os.path.join(root, 'loadtest')
+
+            with override_settings(COMPANY_HISTORY_DIR=configured, SHARED_MODELS_DIR=configured):
+                for transport in ('wsgi', 'asgi'):
+                    json_path = os.path.join(root, f'{transport}.json')
+                    call_command(
+                        'loadtest', '--transport', transport, '--duration', '1', '--rps', '10',
+                        '--mix', 'predict=0.6,scenarios=0.3,upload=0.1', '--upload-rows', '200',
+                        '--seed', '1', '--data-dir', data_dir, '--json', json_path,
+                        stdout=io.StringIO()
+                    )
+
+                    with open(json_path) as f:
+                        report = json.load(f)
+                    self.assertEqual(report['completed_requests'], report['offered_requests'], transport)
+                    for kind, stats in report['endpoints'].items():
+                        self.assertEqual(stats['errors'], 0, (transport, kind, stats['status_counts']))
+
+            self.assertFalse(os.path.exists(configured))
+            self.assertTrue(os.listdir(os.path.join(data_dir, 'history')))
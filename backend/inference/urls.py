@@ -6,4 +6,9 @@ urlpatterns = [
     path('health/', views.health_check, name='health_check'),
     path('predict/', views.predict_cost, name='predict_cost'),  # Make sure this exists
     path('scenarios/', views.scenario_analysis, name='scenario_analysis'),
+    path('portfolio/', views.portfolio_analysis, name='portfolio_analysis'),
+    path('upload/', views.upload_company_data, name='upload_company_data'),
+    path('outcomes/', views.record_outcomes, name='record_outcomes'),
+    path('monitoring/', views.model_monitoring, name='model_monitoring'),
+    path('compact/', views.compact_model, name='compact_model'),
 ]
\ No newline at end of file
@@ -1,23 +1,45 @@
 # inference/views.py
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
 import json
+import math
+import threading
 import warnings
+from django.conf import settings
+from . import history, warmup
+from .monitoring import CompanyMonitor, build_feature_baseline
 warnings.filterwarnings('ignore')
 
+# pandas, NumPy and scikit-learn are imported inside the methods that need
+# them, so workers that only answer health checks never load the scientific
+# stack. inference.warmup loads it up front when WARMUP_ENABLED is set.
+
+# Candidate model features, in training column order
+FEATURE_COLUMNS = [
+    'project_size', 'project_duration', 'labor_cost', 'material_cost', 
+    'equipment_cost', 'overhead_cost', 'inflation_rate', 'region', 
+    'year', 'delays', 'rework_percent', 'safety_incidents', 'project_type'
+]
+
+# Fields every project must carry to be priced
+REQUIRED_FIELDS = ['project_type', 'project_size', 'project_duration', 
+                   'labor_cost', 'material_cost', 'equipment_cost', 'overhead_cost',
+                   'region', 'year']
+
 class CompanyDataPredictor:
-    def _init_(self):
+    def __init__(self):
         self.company_models = {}
         self.company_data = {}
         self.company_analysis = {}
+        self.company_monitors = {}
+        self.retrain_pending = set()
+        self.retrain_lock = threading.Lock()
+        self.shared_store = None
     
     def load_company_dataset(self, file_path, company_name):
         """Load and analyze company's historical dataset"""
+        import pandas as pd
+        
         print(f"📊 Loading dataset for {company_name}...")
         
         try:
@@ -25,8 +47,9 @@ class CompanyDataPredictor:
             df = pd.read_csv(file_path)
             print(f"✅ Dataset loaded: {df.shape[0]} projects, {df.shape[1]} features")
             
-            # Store company data
+            # Store company data, on disk as well so any process can retrain from it
             self.company_data[company_name] = df
+            history.save_history(company_name, df)
             self.company_analysis[company_name] = self.analyze_company_data(df, company_name)
             
             # Train model immediately
@@ -58,6 +81,9 @@ class CompanyDataPredictor:
         if 'project_type' in df.columns:
             analysis['project_types'] = df['project_type'].value_counts().to_dict()
         
+        # Training distribution baseline for drift monitoring
+        analysis['feature_baseline'] = build_feature_baseline(df, FEATURE_COLUMNS)
+        
         print(f"📈 Company Analysis Complete:")
         print(f"   • Projects: {analysis['total_projects']}")
         print(f"   • Avg Cost: ₹{analysis['avg_project_cost']:,.2f}")
@@ -82,15 +108,11 @@ class CompanyDataPredictor:
             print(f"❌ No data found for {company_name}")
             return None
         
-        df = self.company_data[company_name]
+        from sklearn.ensemble import RandomForestRegressor
         
-        # Prepare features
-        X = self.prepare_features(df)
-        y = df['final_project_cost']
+        X_train, X_test, y_train, y_test = self.split_company_data(company_name)
         
         # Train model
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
         model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
         model.fit(X_train, y_train)
         
@@ -98,29 +120,182 @@ class CompanyDataPredictor:
         train_score = model.score(X_train, y_train)
         test_score = model.score(X_test, y_test)
         
+        # Baseline errors the live outcomes are compared against
+        baseline_mae, baseline_mape = self.baseline_errors(model, X_test, y_test)
+        
+        # Training label encoding, so batches are encoded the same way as history
+        raw_features = self.company_data[company_name][list(X_train.columns)]
+        categories = {
+            col: sorted(raw_features[col].astype(str).unique())
+            for col in raw_features.select_dtypes(include=['object']).columns
+        }
+        
         self.company_models[company_name] = {
             'model': model,
-            'features': list(X.columns),
+            'features': list(X_train.columns),
+            'categories': categories,
             'train_score': train_score,
-            'test_score': test_score
+            'test_score': test_score,
+            'baseline_mae': baseline_mae,
+            'baseline_mape': baseline_mape
         }
         
+        self.reset_monitor(company_name)
+        
         print(f"✅ AI Model trained for {company_name}")
         print(f"   Model Accuracy: {test_score:.3f}")
         
+        if getattr(settings, 'COMPACTION_ENABLED', False):
+            self.compact_company_model(company_name, publish=False)
+        
+        if getattr(settings, 'SHARED_MODELS_ENABLED', False):
+            self.publish_company_model(company_name)
+        
         return model
     
+    def baseline_errors(self, model, X_test, y_test):
+        """Held-out MAE and MAPE of a model, the baseline for drift monitoring"""
+        import numpy as np
+        
+        test_errors = np.abs(model.predict(X_test) - y_test.values)
+        nonzero = y_test.values != 0
+        baseline_mae = float(test_errors.mean())
+        baseline_mape = float((test_errors[nonzero] / np.abs(y_test.values[nonzero])).mean() * 100) if nonzero.any() else None
+        
+        return baseline_mae, baseline_mape
+    
+    def reset_monitor(self, company_name):
+        """Start monitoring a company's current model from a clean window"""
+        model_info = self.company_models[company_name]
+        analysis = self.company_analysis.get(company_name, {})
+        self.company_monitors[company_name] = CompanyMonitor(
+            analysis.get('feature_baseline', {}),
+            model_info['baseline_mae'],
+            model_info['baseline_mape'],
+            window_alpha=getattr(settings, 'DRIFT_WINDOW_ALPHA', 0.05),
+            sketch_alpha=getattr(settings, 'DRIFT_SKETCH_ALPHA', 0.005)
+        )
+    
+    def publish_company_model(self, company_name):
+        """Publish a company's model as a shared artifact and serve it from there"""
+        from . import artifacts
+        
+        artifacts.publish(
+            company_name,
+            self.company_models[company_name],
+            self.company_analysis.get(company_name, {})
+        )
+        
+        # Drop this process's private copy in favour of the memory-mapped one
+        self.sync_shared_model(company_name)
+    
+    def shared_model_changed(self, company_name):
+        """Whether a newer artifact than the one this process serves has been published"""
+        if not getattr(settings, 'SHARED_MODELS_ENABLED', False) or self.shared_store is None:
+            return False
+        
+        from .artifacts import current_version
+        
+        published = current_version(company_name)
+        return published is not None and published != self.shared_store.versions.get(company_name)
+    
+    def sync_shared_model(self, company_name):
+        """Swap to the latest published artifact for a company, if it changed"""
+        if not getattr(settings, 'SHARED_MODELS_ENABLED', False):
+            return
+        
+        from .artifacts import SharedModelStore
+        
+        if self.shared_store is None:
+            self.shared_store = SharedModelStore()
+        
+        try:
+            loaded = self.shared_store.refresh(company_name)
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not load shared model for {company_name}: {e}")
+            return
+        
+        if loaded is None:
+            return
+        
+        model_info, analysis = loaded
+        self.company_models[company_name] = model_info
+        self.company_analysis[company_name] = analysis
+        self.reset_monitor(company_name)
+    
+    def split_company_data(self, company_name):
+        """Train/test split of a company's history, identical on every call"""
+        from sklearn.model_selection import train_test_split
+        
+        df = self.company_data[company_name]
+        
+        # Prepare features
+        X = self.prepare_features(df)
+        y = df['final_project_cost']
+        
+        return train_test_split(X, y, test_size=0.2, random_state=42)
+    
+    def compact_company_model(self, company_name, publish=True, **options):
+        """Replace a company's forest with a pruned, float32 compact model"""
+        if company_name not in self.company_models or company_name not in self.company_data:
+            print(f"❌ No model found for {company_name}")
+            return None
+        
+        model_info = self.company_models[company_name]
+        if 'compaction' in model_info:
+            print(f"ℹ Model for {company_name} is already compacted")
+            return model_info['compaction']
+        
+        if not hasattr(model_info['model'], 'estimators_'):
+            print(f"❌ Model for {company_name} is a shared artifact; compact it at training time instead")
+            return None
+        
+        from .compaction import compact_forest
+        
+        X_train, X_test, y_train, y_test = self.split_company_data(company_name)
+        
+        compact, report = compact_forest(
+            model_info['model'], X_train, y_train, X_test, y_test,
+            max_depth=options.get('max_depth', getattr(settings, 'COMPACTION_MAX_DEPTH', None)),
+            min_samples_leaf=options.get('min_samples_leaf', getattr(settings, 'COMPACTION_MIN_SAMPLES_LEAF', 1)),
+            use_float32=options.get('float32', getattr(settings, 'COMPACTION_FLOAT32', True)),
+            max_trees=options.get('max_trees', getattr(settings, 'COMPACTION_MAX_TREES', None)),
+            max_accuracy_loss=options.get('max_accuracy_loss', getattr(settings, 'COMPACTION_MAX_ACCURACY_LOSS', 0.01))
+        )
+        
+        if compact is None:
+            print(f"⚠ Compaction refused for {company_name}: accuracy loss {report['accuracy_loss']:.4f}")
+            return report
+        
+        # Scores and drift baselines now describe the compacted model
+        baseline_mae, baseline_mape = self.baseline_errors(compact, X_test, y_test)
+        model_info.update({
+            'model': compact,
+            'compaction': report,
+            'train_score': float(compact.score(X_train, y_train)),
+            'test_score': report['compacted']['test_score'],
+            'baseline_mae': baseline_mae,
+            'baseline_mape': baseline_mape
+        })
+        self.reset_monitor(company_name)
+        
+        print(f"🗜 Model compacted for {company_name}")
+        print(f"   Size: {report['original']['size_bytes']:,} → {report['compacted']['size_bytes']:,} bytes")
+        print(f"   Model Accuracy: {report['compacted']['test_score']:.3f}")
+        
+        if publish and getattr(settings, 'SHARED_MODELS_ENABLED', False):
+            self.publish_company_model(company_name)
+        
+        return report
+    
     def prepare_features(self, df):
         """Prepare features for training"""
+        from sklearn.preprocessing import LabelEncoder
+        
         # Select available features
         feature_columns = []
-        possible_features = [
-            'project_size', 'project_duration', 'labor_cost', 'material_cost', 
-            'equipment_cost', 'overhead_cost', 'inflation_rate', 'region', 
-            'year', 'delays', 'rework_percent', 'safety_incidents', 'project_type'
-        ]
         
-        for feature in possible_features:
+        for feature in FEATURE_COLUMNS:
             if feature in df.columns:
                 feature_columns.append(feature)
         
@@ -135,6 +310,15 @@ class CompanyDataPredictor:
     
     def predict_with_company_data(self, company_name, project_data):
         """Predict project cost using company's historical data"""
+        predictions = self.predict_batch_with_company_data(company_name, [project_data])
+        
+        if predictions is None:
+            return None
+        
+        return predictions[0]
+    
+    def predict_batch_with_company_data(self, company_name, projects):
+        """Predict the cost of many projects in one model call"""
         if company_name not in self.company_models:
             print(f"❌ No model found for {company_name}. Training now...")
             self.train_company_model(company_name)
@@ -142,38 +326,120 @@ class CompanyDataPredictor:
         if company_name not in self.company_models:
             return None
         
+        import pandas as pd
+        
         model_info = self.company_models[company_name]
         model = model_info['model']
         expected_features = model_info['features']
         
         # Prepare input data
-        input_df = pd.DataFrame([project_data])
+        input_df = pd.DataFrame(list(projects))
         
         # Ensure all expected features are present
         for feature in expected_features:
+            # Add missing features with default values
+            if feature in ['project_type', 'region']:
+                default = 'Unknown'
+            else:
+                default = 0
+
+            # A batch can mix projects that carry a field with projects that omit it,
+            # so fill per value to score each project as it would be scored alone
             if feature not in input_df.columns:
-                # Add missing features with default values
-                if feature in ['labor_cost', 'material_cost', 'equipment_cost', 'overhead_cost']:
-                    input_df[feature] = 0
-                elif feature == 'project_type':
-                    input_df[feature] = 'Unknown'
-                elif feature == 'region':
-                    input_df[feature] = 'Unknown'
-                else:
-                    input_df[feature] = 0
+                input_df[feature] = default
+            else:
+                input_df[feature] = input_df[feature].fillna(default)
         
         # Reorder columns to match training
         input_df = input_df[expected_features]
         
-        # Encode categorical variables
+        # Encode categorical variables with the training classes (unseen values become -1)
+        categories = model_info.get('categories', {})
         for col in input_df.select_dtypes(include=['object']).columns:
-            if col in input_df.columns:
+            if col in categories:
+                input_df[col] = pd.Categorical(input_df[col].astype(str), categories=categories[col]).codes
+            else:
                 input_df[col] = input_df[col].astype('category').cat.codes
         
         # Make prediction
-        predicted_cost = model.predict(input_df)[0]
+        return model.predict(input_df)
+    
+    def record_outcomes(self, company_name, outcomes):
+        """Compare actual final costs with their predictions and check for drift"""
+        if company_name not in self.company_monitors:
+            return None
+        
+        # Re-predict, in one call, the outcomes that arrive without their prediction
+        missing = [index for index, outcome in enumerate(outcomes) if outcome.get('predicted_cost') is None]
+        predicted = [outcome.get('predicted_cost') for outcome in outcomes]
+        if missing:
+            repredicted = self.predict_batch_with_company_data(company_name, [outcomes[index] for index in missing])
+            for index, value in zip(missing, repredicted):
+                predicted[index] = value
+        
+        monitor = self.company_monitors[company_name]
+        for outcome, predicted_cost in zip(outcomes, predicted):
+            monitor.observe(outcome, float(predicted_cost), float(outcome['actual_cost']))
+        
+        # Completed projects join the on-disk history the next retrain reads
+        rows = [dict(outcome, final_project_cost=outcome['actual_cost']) for outcome in outcomes]
+        history.append_outcomes(company_name, rows, FEATURE_COLUMNS + ['final_project_cost'])
+        
+        report = self.get_drift_report(company_name)
+        if report['drift_detected'] and history.has_history(company_name):
+            report['retrain_scheduled'] = self.schedule_retrain(company_name)
+        
+        return report
+    
+    def get_drift_report(self, company_name):
+        """Current accuracy and drift statistics for a company's model"""
+        monitor = self.company_monitors[company_name]
+        report = monitor.drift_report(
+            psi_threshold=getattr(settings, 'DRIFT_PSI_THRESHOLD', 0.2),
+            mape_ratio=getattr(settings, 'DRIFT_MAPE_RATIO', 1.5),
+            min_outcomes=getattr(settings, 'DRIFT_MIN_OUTCOMES', 30),
+            min_samples_per_bin=getattr(settings, 'DRIFT_MIN_SAMPLES_PER_BIN', 10)
+        )
+        report['retrain_pending'] = company_name in self.retrain_pending
+        return report
+    
+    def schedule_retrain(self, company_name):
+        """Retrain a company's model in the background, at most once at a time"""
+        with self.retrain_lock:
+            if company_name in self.retrain_pending:
+                return False
+            self.retrain_pending.add(company_name)
         
-        return predicted_cost
+        print(f"🔁 Drift detected for {company_name}, retraining scheduled")
+        thread = threading.Thread(target=self._run_retrain, args=(company_name,), daemon=True)
+        thread.start()
+        return True
+    
+    def _run_retrain(self, company_name):
+        try:
+            # Every worker watches its own share of outcomes; the history on disk
+            # lets whichever one sees drift first retrain, one process at a time
+            with history.retrain_lock(company_name) as acquired:
+                if not acquired:
+                    print(f"ℹ {company_name} is already being retrained by another process")
+                    return
+                
+                if self.shared_model_changed(company_name):
+                    print(f"ℹ {company_name} was retrained elsewhere, switching to the new model")
+                    self.sync_shared_model(company_name)
+                    return
+                
+                df = history.load_history(company_name)
+                if df is None:
+                    df = self.company_data[company_name]
+                self.company_data[company_name] = df
+                self.company_analysis[company_name] = self.analyze_company_data(df, company_name)
+                self.train_company_model(company_name)
+        except Exception as e:
+            print(f"❌ Retrain failed for {company_name}: {e}")
+        finally:
+            with self.retrain_lock:
+                self.retrain_pending.discard(company_name)
     
     def get_company_insights(self, company_name, project_data, predicted_cost):
         """Get insights based on company's historical performance"""
@@ -289,13 +555,23 @@ predictor = CompanyDataPredictor()
 
 @csrf_exempt
 def health_check(request):
-    """Health check endpoint"""
+    """Health check endpoint
+
+    Always answers 200 while the process is alive; ``?probe=ready`` answers
+    503 until the boot warm-up has finished.
+    """
+    readiness = warmup.status()
+    status = 503 if request.GET.get('probe') == 'ready' and not readiness['ready'] else 200
+    
     return JsonResponse({
         'status': 'healthy',
         'service': 'AI Project Cost Advisor with Company Data',
         'message': 'Service is running correctly',
+        'live': True,
+        'ready': readiness['ready'],
+        'warmup': readiness,
         'loaded_companies': list(predictor.company_models.keys())
-    })
+    }, status=status)
 
 @csrf_exempt
 @csrf_exempt
@@ -306,11 +582,7 @@ def predict_cost(request):
             data = json.loads(request.body)
             
             # Validate required fields
-            required_fields = ['project_type', 'project_size', 'project_duration', 
-                             'labor_cost', 'material_cost', 'equipment_cost', 'overhead_cost',
-                             'region', 'year']
-            
-            missing_fields = [field for field in required_fields if field not in data]
+            missing_fields = [field for field in REQUIRED_FIELDS if field not in data]
             if missing_fields:
                 return JsonResponse({
                     'error': f'Missing required fields: {", ".join(missing_fields)}'
@@ -318,6 +590,7 @@ def predict_cost(request):
             
             # Get company name from request or use default
             company_name = data.get('company_name', 'Default Company')
+            predictor.sync_shared_model(company_name)
             
             # Check if company has historical data loaded
             if company_name not in predictor.company_models:
@@ -401,6 +674,235 @@ def scenario_analysis(request):
     else:
         return JsonResponse({'error': 'Method not allowed. Use POST.'}, status=405)
 
+@csrf_exempt
+def portfolio_analysis(request):
+    """Roll up cost forecasts and joint risk across a portfolio of projects"""
+    if request.method == 'POST':
+        # Portfolios are far larger than DATA_UPLOAD_MAX_MEMORY_SIZE allows for
+        # request.body, so the stream is read directly under a separate limit
+        max_body = getattr(settings, 'PORTFOLIO_MAX_BODY_BYTES', 32 * 1024 * 1024)
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > max_body:
+            return JsonResponse({
+                'error': f'Portfolio too large: request body exceeds {max_body} bytes'
+            }, status=413)
+        
+        try:
+            body = request.read(max_body + 1)
+            if len(body) > max_body:
+                return JsonResponse({
+                    'error': f'Portfolio too large: request body exceeds {max_body} bytes'
+                }, status=413)
+            
+            data = json.loads(body)
+            
+            company_name = data.get('company_name', 'Default Company')
+            predictor.sync_shared_model(company_name)
+            projects = data.get('projects', [])
+            if not projects:
+                return JsonResponse({'error': 'No projects provided'}, status=400)
+            
+            invalid = [
+                index for index, project in enumerate(projects)
+                if any(field not in project for field in REQUIRED_FIELDS)
+            ]
+            if invalid:
+                return JsonResponse({
+                    'error': f'Missing required fields in projects: {", ".join(map(str, invalid[:20]))}',
+                    'required_fields': REQUIRED_FIELDS
+                }, status=400)
+            
+            try:
+                simulations = int(data.get('simulations', getattr(settings, 'PORTFOLIO_SIMULATIONS', 5000)))
+            except (TypeError, ValueError):
+                simulations = 0
+            if simulations < 1:
+                return JsonResponse({
+                    'error': 'simulations must be a positive integer'
+                }, status=400)
+            simulations = min(simulations, getattr(settings, 'PORTFOLIO_MAX_SIMULATIONS', 20000))
+            
+            from .portfolio import build_portfolio_frame, rollup, simulate_portfolio
+            
+            # Score every project in one model call
+            if company_name in predictor.company_models:
+                predicted_costs = predictor.predict_batch_with_company_data(company_name, projects)
+                model_used = company_name
+            else:
+                predicted_costs = [fallback_prediction(project) for project in projects]
+                model_used = 'General industry data'
+            
+            frame = build_portfolio_frame(projects, predicted_costs)
+            
+            shock_sd = dict(getattr(settings, 'PORTFOLIO_SHOCK_SD', {}))
+            shock_sd.update(data.get('shock_sd', {}))
+            
+            monte_carlo = simulate_portfolio(
+                frame,
+                shock_sd=shock_sd,
+                shock_correlation=getattr(settings, 'PORTFOLIO_SHOCK_CORRELATION', [[1, 0, 0], [0, 1, 0], [0, 0, 1]]),
+                idiosyncratic_sd=getattr(settings, 'PORTFOLIO_IDIOSYNCRATIC_SD', 0.08),
+                simulations=simulations,
+                seed=data.get('seed')
+            )
+            
+            return JsonResponse({
+                'success': True,
+                'company_used': model_used,
+                'portfolio': {
+                    'projects': len(frame),
+                    'base_cost': float(frame['base_cost'].sum()),
+                    'predicted_cost': float(frame['predicted_cost'].sum()),
+                    'by_region': rollup(frame, 'region'),
+                    'by_year': rollup(frame, 'year')
+                },
+                'monte_carlo': monte_carlo
+            })
+            
+        except Exception as e:
+            return JsonResponse({
+                'error': f'Portfolio analysis failed: {str(e)}'
+            }, status=500)
+    else:
+        return JsonResponse({'error': 'Method not allowed. Use POST.'}, status=405)
+
+@csrf_exempt
+def record_outcomes(request):
+    """Ingest actual final costs for previously predicted projects"""
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            
+            company_name = data.get('company_name', 'Default Company')
+            predictor.sync_shared_model(company_name)
+            if company_name not in predictor.company_monitors:
+                return JsonResponse({
+                    'error': f'No trained model for {company_name}'
+                }, status=404)
+            
+            # Accept a single outcome or a batch under "outcomes"
+            outcomes = data.get('outcomes', [data])
+            if not isinstance(outcomes, list) or not outcomes or \
+                    not all(isinstance(outcome, dict) for outcome in outcomes):
+                return JsonResponse({
+                    'error': 'outcomes must be a non-empty list of projects'
+                }, status=400)
+            
+            missing = [index for index, outcome in enumerate(outcomes) if 'actual_cost' not in outcome]
+            if missing:
+                return JsonResponse({
+                    'error': f'Missing actual_cost for outcomes: {", ".join(map(str, missing[:20]))}'
+                }, status=400)
+            
+            # Outcomes are re-predicted and join the retraining set, so they need
+            # the same project fields as /predict/ and a usable actual cost
+            invalid = [
+                index for index, outcome in enumerate(outcomes)
+                if any(field not in outcome for field in REQUIRED_FIELDS)
+            ]
+            if invalid:
+                return JsonResponse({
+                    'error': f'Missing required fields in outcomes: {", ".join(map(str, invalid[:20]))}',
+                    'required_fields': REQUIRED_FIELDS
+                }, status=400)
+            
+            invalid = [
+                index for index, outcome in enumerate(outcomes)
+                if not is_positive_number(outcome['actual_cost'])
+                or not (outcome.get('predicted_cost') is None or is_positive_number(outcome['predicted_cost']))
+            ]
+            if invalid:
+                return JsonResponse({
+                    'error': f'actual_cost and predicted_cost must be positive numbers in outcomes: {", ".join(map(str, invalid[:20]))}'
+                }, status=400)
+            
+            report = predictor.record_outcomes(company_name, outcomes)
+            
+            return JsonResponse({
+                'success': True,
+                'company_name': company_name,
+                'outcomes_recorded': len(outcomes),
+                'monitoring': report
+            })
+            
+        except Exception as e:
+            return JsonResponse({
+                'error': f'Outcome ingest failed: {str(e)}'
+            }, status=500)
+    else:
+        return JsonResponse({'error': 'Method not allowed. Use POST.'}, status=405)
+
+@csrf_exempt
+def model_monitoring(request):
+    """Get accuracy and drift statistics for loaded company models"""
+    if request.method == 'GET':
+        return JsonResponse({
+            'success': True,
+            'companies': {
+                company_name: predictor.get_drift_report(company_name)
+                for company_name in predictor.company_monitors
+            }
+        })
+    else:
+        return JsonResponse({'error': 'Method not allowed. Use GET.'}, status=405)
+
+@csrf_exempt
+def compact_model(request):
+    """Compact a company's trained model"""
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            
+            company_name = data.get('company_name', 'Default Company')
+            predictor.sync_shared_model(company_name)
+            options = {
+                key: data[key]
+                for key in ['max_depth', 'min_samples_leaf', 'float32', 'max_trees', 'max_accuracy_loss']
+                if key in data
+            }
+            
+            # max_depth and max_trees may be null for "no limit"
+            invalid = [
+                key for key in ['max_depth', 'min_samples_leaf', 'max_trees']
+                if key in options and not is_positive_integer(options[key])
+                and not (options[key] is None and key != 'min_samples_leaf')
+            ]
+            if invalid:
+                return JsonResponse({
+                    'error': f'{", ".join(invalid)} must be positive integers'
+                }, status=400)
+            
+            # The original forest is gone once compacted, so other options cannot be applied to it
+            model_info = predictor.company_models.get(company_name, {})
+            if 'compaction' in model_info:
+                return JsonResponse({
+                    'error': f'Model for {company_name} is already compacted; '
+                             f'upload its data again to compact with other options',
+                    'compaction': model_info['compaction']
+                }, status=409)
+            
+            report = predictor.compact_company_model(company_name, **options)
+            if report is None:
+                return JsonResponse({
+                    'error': f'No compactable model for {company_name}'
+                }, status=404)
+            
+            return JsonResponse({
+                'success': report['applied'],
+                'company_name': company_name,
+                'compaction': report
+            })
+            
+        except Exception as e:
+            return JsonResponse({
+                'error': f'Model compaction failed: {str(e)}'
+            }, status=500)
+    else:
+        return JsonResponse({'error': 'Method not allowed. Use POST.'}, status=405)
+
 @csrf_exempt
 def upload_company_data(request):
     """Upload company historical data"""
@@ -482,6 +984,15 @@ def fallback_prediction(project_data):
     
     return base_cost * risk_multiplier
 
+def is_positive_number(value):
+    """Whether a JSON value is a finite number greater than zero"""
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and math.isfinite(value) and value > 0)
+
+def is_positive_integer(value):
+    """Whether a JSON value is an integer of at least one"""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 1
+
 def generate_recommendations(contingency_percent, high_risk_areas):
     """Generate recommendations based on risk analysis"""
     recommendations = []
@@ -0,0 +1,118 @@
+# inference/warmup.py
+"""Optional warm-up of a worker at boot.
+
+backend/wsgi.py and backend/asgi.py call ``start()`` once the application is
+built. With WARMUP_ENABLED set, a background thread imports the scientific
+stack, loads every company listed in WARMUP_COMPANIES and runs one dummy
+prediction per model, so the first real request does not pay those costs.
+Liveness is unaffected; readiness is reported through ``status()``.
+
+Threads do not survive ``fork``, so every process forked after the
+application was built starts its own warm-up from an ``os.register_at_fork``
+hook, as soon as it is born. Under ``gunicorn --preload`` the application is
+built in the master, which only forks workers; set WARMUP_PRELOAD so the
+master skips warming itself and cannot be mid-fit (holding OpenMP or joblib
+locks) when a worker is forked.
+"""
+import os
+import threading
+import time
+
+from django.conf import settings
+
+_lock = threading.Lock()
+_state = {
+    'pid': None,
+    'enabled': False,
+    'started': False,
+    'finished': False,
+    'seconds': None,
+    'companies': {},
+}
+
+
+def start():
+    """Kick off the warm-up thread once per process"""
+    with _lock:
+        if _state['pid'] == os.getpid():
+            return
+        _state['pid'] = os.getpid()
+
+    # A preloading master only forks workers, and each of them warms up in _after_fork
+    if getattr(settings, 'WARMUP_PRELOAD', False):
+        return
+
+    _begin()
+
+
+def _begin():
+    _state.update(started=True, finished=False, seconds=None, companies={})
+    _state['enabled'] = getattr(settings, 'WARMUP_ENABLED', False)
+
+    if not _state['enabled']:
+        _state['finished'] = True
+        return
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+
+
+def _after_fork():
+    """Warm up a freshly forked worker of a process that built the application"""
+    global _lock
+    # The parent's warm-up thread may have held the lock at the moment of fork
+    _lock = threading.Lock()
+
+    if _state['pid'] is None:
+        return
+
+    _state['pid'] = os.getpid()
+    _begin()
+
+
+def run():
+    """Import the model stack and pre-load the configured company models"""
+    started = time.perf_counter()
+    print("🔥 Warming up inference worker...")
+
+    try:
+        import numpy  # noqa: F401
+        import pandas  # noqa: F401
+        from sklearn.ensemble import RandomForestRegressor  # noqa: F401
+        from sklearn.model_selection import train_test_split  # noqa: F401
+        from sklearn.preprocessing import LabelEncoder  # noqa: F401
+
+        from .views import predictor
+
+        for company_name, file_path in getattr(settings, 'WARMUP_COMPANIES', {}).items():
+            try:
+                # In shared serving mode a published artifact is mapped instead of retrained
+                predictor.sync_shared_model(company_name)
+                if company_name not in predictor.company_models:
+                    if not predictor.load_company_dataset(file_path, company_name):
+                        _state['companies'][company_name] = 'failed to load'
+                        continue
+
+                # Missing features are defaulted, so an empty project exercises the full predict path
+                predictor.predict_with_company_data(company_name, {})
+                _state['companies'][company_name] = 'ready'
+            except Exception as e:
+                _state['companies'][company_name] = f'failed: {e}'
+    finally:
+        _state['seconds'] = time.perf_counter() - started
+        _state['finished'] = True
+        print(f"✅ Warm-up finished in {_state['seconds']:.2f}s")
+
+
+def status():
+    """Readiness of this worker; ready once warm-up is done or disabled"""
+    return {
+        'ready': _state['finished'] or not _state['started'],
+        'enabled': _state['enabled'],
+        'seconds': _state['seconds'],
+        'companies': dict(_state['companies']),
+    }
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)